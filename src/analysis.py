@@ -21,49 +21,60 @@ class SufficiencyCheck:
     message: str
     suggestions: List[str]
 
-def analyze_controller_characteristics(df: pd.DataFrame) -> ControllerStats:
+def _controller_kernel(t_sec: np.ndarray, sp: np.ndarray, pv: np.ndarray, op: np.ndarray) -> Tuple[float, float, float, float, float]:
     """
-    Quantify controller behavior using time-weighted metrics.
-    Handles uneven timestamps robustly.
+    Reduce raw arrays to (total_variation, std_d_op, std_error, avg_dt, max_dt).
+    Array-only so every intermediate is computed exactly once.
     """
-    df = df.sort_values('Time')
-    t_sec = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().values
+    # dt only feeds mean/max (never a divisor), so no zero guard is needed
     dt = np.diff(t_sec)
     
-    # Avoid div by zero
-    dt = np.where(dt < 1e-6, 1e-6, dt)
-    
-    op = df['OP'].values
-    pv = df['PV'].values
-    sp = df['SP'].values
-    error = sp - pv
-    
-    # 1. Total Variation (TV) - Measure of Control Effort / Valve Wear
+    # Total Variation (TV) - Measure of Control Effort / Valve Wear
     # TV = Sum( |OP_i - OP_{i-1}| )
-    # Normalized by time duration to get "Movement per Minute" maybe?
-    # Let's keep it absolute sum first, but imply rate.
     op_diff = np.diff(op)
-    total_variation = np.sum(np.abs(op_diff))
+    total_variation = np.abs(op_diff).sum()
+    
+    error = np.subtract(sp, pv)
+    
+    # Mean interval telescopes to span / count: no extra pass over dt
+    avg_dt = (t_sec[-1] - t_sec[0]) / dt.size
+    
+    # Spread of OP moves vs error (aggressiveness inputs) and sampling stats.
+    # ndarray.std is NumPy's stable two-pass variance; a one-pass Welford update only
+    # pays off inside a compiled loop.
+    return total_variation, op_diff.std(), error.std(), avg_dt, dt.max()
+
+def analyze_controller_characteristics(df: pd.DataFrame, t_sec: Optional[np.ndarray] = None) -> ControllerStats:
+    """
+    Quantify controller behavior using time-weighted metrics.
+    Handles uneven timestamps robustly.
+    Pass a precomputed relative time axis `t_sec` (seconds, df already sorted) to skip the datetime conversion.
+    """
+    if t_sec is None:
+        # Ingested data is already sorted; only pay for the sort when it isn't
+        if not df['Time'].is_monotonic_increasing:
+            df = df.sort_values('Time')
+        
+        # Integer nanosecond view avoids the .dt.total_seconds() Series round-trip
+        t_ns = df['Time'].values.astype('datetime64[ns]', copy=False).view('i8')
+        t_sec = (t_ns - t_ns[0]) / 1e9
+    
+    # Extract all numeric columns in one block
+    sp, pv, op = df[['SP', 'PV', 'OP']].to_numpy(dtype=np.float64).T
+    total_variation, std_d_op, std_error, avg_dt, max_dt = _controller_kernel(t_sec, sp, pv, op)
     
     # Normalize TV per minute for readability
     duration_min = t_sec[-1] / 60.0 if t_sec[-1] > 0 else 1.0
     tv_per_min = total_variation / duration_min
     
-    # 2. Aggressiveness
+    # Aggressiveness
     # StdDev(Delta OP) / StdDev(Error)
     # If error is small but OP moves a lot -> Aggressive / Noise Amplification
-    std_d_op = np.std(op_diff)
-    std_error = np.std(error)
-    
     if std_error < 1e-6:
         aggressiveness = 0.0 # Perfect control or dead sensor
     else:
         aggressiveness = std_d_op / std_error
 
-    # 3. Sampling Stats
-    avg_dt = np.mean(dt)
-    max_dt = np.max(dt)
-    
     # Quality Score (Simple heuristic)
     # Penalize high max_dt variance
     score = 100.0
@@ -81,12 +92,15 @@ def analyze_controller_characteristics(df: pd.DataFrame) -> ControllerStats:
         data_quality_score=max(0, score)
     )
 
-def check_data_sufficiency(df: pd.DataFrame, model: Optional[FOPDTModel] = None) -> SufficiencyCheck:
+def check_data_sufficiency(df: pd.DataFrame, model: Optional[FOPDTModel] = None, t_sec: Optional[np.ndarray] = None) -> SufficiencyCheck:
     """
     Check if data covers enough dynamic response time.
     """
-    t_sec = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().values
-    duration = t_sec[-1]
+    if t_sec is None:
+        # Only the span is needed: Timestamp.value is int64 nanoseconds
+        duration = (df['Time'].iloc[-1].value - df['Time'].iloc[0].value) / 1e9
+    else:
+        duration = t_sec[-1]
     
     suggestions = []
     
@@ -6,14 +6,17 @@ from plotly.subplots import make_subplots
 import sys
 import os
 import pickle
+import zipfile
 import datetime
+import uuid
 from io import BytesIO
+import pyarrow as pa
 
 # 将项目根目录添加到 sys.path，以便能够导入 src 模块
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.ingestion import load_and_validate_data, IngestionError
-from src.diagnosis import analyze_loop_health, HealthStatus, analyze_advanced_valve_health, ValveHealthReport
+from src.diagnosis import analyze_loop_health, HealthStatus, analyze_advanced_valve_health, ValveHealthReport, DiagnosisResult
 from src.modeling import fit_fopdt, FOPDTModel
 # ... (rest of imports)
 from src.tuning import calculate_imc_pid, suggest_parameters, PIDParams, TuningSuggestion
@@ -78,13 +81,89 @@ st.markdown(r"""
 <div class="watermark"></div>
 """, unsafe_allow_html=True)
 
+# --- 缓存包装：Streamlit 每次交互都会重跑脚本，纯函数结果按输入缓存 ---
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_uploaded_data(raw_bytes: bytes, filename: str) -> pd.DataFrame:
+    """按上传文件内容缓存解析结果：自动映射列名并校验。"""
+    # 列名识别只需表头，预览仅读前几行，完整解析交给 load_and_validate_data
+    if filename.lower().endswith(('.xlsx', '.xls')):
+        df_preview = pd.read_excel(BytesIO(raw_bytes), nrows=5)
+    else:
+        df_preview = pd.read_csv(BytesIO(raw_bytes), nrows=5)
+        
+    cmap = {}
+    for c in df_preview.columns.tolist():
+        cl = str(c).lower()
+        if 'time' in cl or 'date' in cl: cmap[c] = 'Time'
+        elif 'sp' in cl or 'set' in cl: cmap[c] = 'SP'
+        elif 'pv' in cl or 'process' in cl: cmap[c] = 'PV'
+        elif 'op' in cl or 'out' in cl: cmap[c] = 'OP'
+    
+    return load_and_validate_data(BytesIO(raw_bytes), filename=filename, column_map=cmap)
+
+# 以下缓存以阶段唯一键 ds_key 标识数据，带下划线的参数不参与哈希，避免每次重跑都扫描整个 DataFrame
+@st.cache_data(show_spinner=False, max_entries=32)
+def diagnose_cached(ds_key: str, _df: pd.DataFrame) -> DiagnosisResult:
+    return analyze_loop_health(_df)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def valve_health_cached(ds_key: str, _df: pd.DataFrame) -> ValveHealthReport:
+    return analyze_advanced_valve_health(_df)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def predict_cached(ds_key: str, model_params: tuple, _op: np.ndarray, _t_sec: np.ndarray) -> np.ndarray:
+    """模型拟合曲线：仅在模型参数或数据变化时重新积分。"""
+    return FOPDTModel(*model_params).predict(_op, _t_sec)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def simulate_cached(K, tau, theta, y0, Kp, Ti, Td, sd_val, stm_pt) -> dict:
+    """闭环仿真预览：以 (模型, PID, 仿真时长) 为键，拖动滑块回到旧值时不再重复积分。"""
+    ts_ax = np.linspace(0, sd_val, 500)
+    ssp_arr = np.where(ts_ax > stm_pt, 10.0, 0.0)
+    return simulate_closed_loop(FOPDTModel(K, tau, theta, y0), PIDParams(Kp, Ti, Td), ssp_arr, ts_ax)
+
+# --- 辅助函数：LTTB 降采样 (仅用于屏幕显示) ---
+MAX_PLOT_POINTS = 2000
+
+def lttb_indices(x, y, n_out=MAX_PLOT_POINTS):
+    """Largest-Triangle-Three-Buckets：返回保留曲线形状的采样点索引。"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        nxt_end = max(min(int((i + 2) * every) + 1, n), end + 1)
+        avg_x, avg_y = x[end:nxt_end].mean(), y[end:nxt_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
 # --- 辅助函数：绘制过程数据趋势图 ---
 def plot_time_series(df, title="实时过程数据趋势图", diag_res=None):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     
-    fig.add_trace(go.Scatter(x=df['Time'], y=df['SP'], name='设定值 (SP)', line=dict(color='green', dash='dash')), secondary_y=False)
-    fig.add_trace(go.Scatter(x=df['Time'], y=df['PV'], name='过程变量 (PV)', line=dict(color='blue')), secondary_y=False)
-    fig.add_trace(go.Scatter(x=df['Time'], y=df['OP'], name='输出 (OP)', line=dict(color='red'), opacity=0.3), secondary_y=True)
+    # float32 足够屏幕显示精度，可减半序列化到浏览器的 JSON 体积
+    t_all = df['Time']
+    sp = df['SP'].to_numpy(dtype=np.float32)
+    pv = df['PV'].to_numpy(dtype=np.float32)
+    op = df['OP'].to_numpy(dtype=np.float32)
+    t_num = (t_all - t_all.iloc[0]).dt.total_seconds().to_numpy()
+    
+    # SP 为阶跃信号：只保留变化点，配合 'hv' 线形即可精确还原
+    sp_idx = np.concatenate(([0], np.flatnonzero(np.diff(sp)) + 1, [len(sp) - 1]))
+    if len(sp_idx) > MAX_PLOT_POINTS:
+        sp_idx = lttb_indices(t_num, sp)
+    pv_idx = lttb_indices(t_num, pv)
+    op_idx = lttb_indices(t_num, op)
+    
+    fig.add_trace(go.Scatter(x=t_all.iloc[sp_idx], y=sp[sp_idx], name='设定值 (SP)', line=dict(color='green', dash='dash'), line_shape='hv'), secondary_y=False)
+    fig.add_trace(go.Scatter(x=t_all.iloc[pv_idx], y=pv[pv_idx], name='过程变量 (PV)', line=dict(color='blue')), secondary_y=False)
+    fig.add_trace(go.Scatter(x=t_all.iloc[op_idx], y=op[op_idx], name='输出 (OP)', line=dict(color='red'), opacity=0.3), secondary_y=True)
     
     # 增加异常标注
     if diag_res:
@@ -111,6 +190,60 @@ def plot_time_series(df, title="实时过程数据趋势图", diag_res=None):
     fig.update_yaxes(title_text="OP (%)", secondary_y=True)
     return fig
 
+# --- 辅助函数：会话进度导出/导入 ---
+SESSION_META_ENTRY = "meta.pkl"
+SESSION_ARRAY_KEYS = ('df', 't_sec', 'op')
+
+def export_session(datasets) -> BytesIO:
+    """打包为 zip：每个阶段的 DataFrame 存为 Feather (列式，无法转换时退回 pickle)，其余字段存入 meta.pkl。"""
+    buffer = BytesIO()
+    # Feather 已是紧凑二进制格式，无需再压缩
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+        meta = []
+        for i, ds in enumerate(datasets):
+            df_buf = BytesIO()
+            try:
+                ds['df'].to_feather(df_buf)
+                zf.writestr(f"df_{i}.feather", df_buf.getvalue())
+            except (pa.ArrowException, ValueError):
+                # 混合类型的附加列 (如备注列) 无法转为 Arrow，该阶段退回 pickle
+                zf.writestr(f"df_{i}.pkl", pickle.dumps(ds['df']))
+            meta.append({k: v for k, v in ds.items() if k not in SESSION_ARRAY_KEYS})
+        zf.writestr(SESSION_META_ENTRY, pickle.dumps(meta))
+    buffer.seek(0)
+    return buffer
+
+def import_session(file) -> list:
+    """读取进度文件；兼容旧版直接 pickle 的 .pkl 文件。"""
+    raw = file.getvalue()
+    if not zipfile.is_zipfile(BytesIO(raw)):
+        return pickle.loads(raw)
+    with zipfile.ZipFile(BytesIO(raw)) as zf:
+        meta = pickle.loads(zf.read(SESSION_META_ENTRY))
+        names = set(zf.namelist())
+        for i, ds in enumerate(meta):
+            if f"df_{i}.feather" in names:
+                ds['df'] = pd.read_feather(BytesIO(zf.read(f"df_{i}.feather")))
+            else:
+                ds['df'] = pickle.loads(zf.read(f"df_{i}.pkl"))
+    return meta
+
+# --- 辅助函数：阶段数据唯一键 ---
+def dataset_key(ds) -> str:
+    """录入时分配的唯一键，作为结果缓存的键；旧版进度文件缺失时补发。"""
+    if 'uid' not in ds:
+        ds['uid'] = uuid.uuid4().hex
+    return ds['uid']
+
+# --- 辅助函数：获取阶段数据的缓存数组 ---
+def get_cached_arrays(ds):
+    """返回 (t_sec, op)。录入时已缓存；旧版进度文件缺失时按需补算一次。"""
+    if 't_sec' not in ds:
+        df = ds['df']
+        ds['t_sec'] = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().to_numpy()
+        ds['op'] = df['OP'].to_numpy()
+    return ds['t_sec'], ds['op']
+
 # --- 辅助函数：渲染整定建议详情卡片 ---
 def render_tuning_suggestion(suggestion: TuningSuggestion):
     st.markdown("### 🔍 详细整定建议面板")
@@ -232,14 +365,12 @@ def main():
             # 自动添加时间戳后缀以防止文件名冲突
             ts_label = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             try:
-                buffer = BytesIO()
-                pickle.dump(st.session_state['datasets'], buffer)
-                buffer.seek(0)
+                buffer = export_session(st.session_state['datasets'])
                 st.download_button(
                     label="导出当前整定进度",
                     data=buffer,
-                    file_name=f"pid_session_{ts_label}.pkl",
-                    mime="application/octet-stream",
+                    file_name=f"pid_session_{ts_label}.zip",
+                    mime="application/zip",
                     help="将当前所有历史数据、模型和 PID 轨迹打包下载到本地。文件名已自动增加时间戳。",
                     width='stretch'
                 )
@@ -248,11 +379,11 @@ def main():
         
         st.markdown("---")
         # 会话恢复
-        upl_sess = st.file_uploader("从本地加载进度文件", type=["pkl"], key="sess_v8_final")
+        upl_sess = st.file_uploader("从本地加载进度文件", type=["zip", "pkl"], key="sess_v8_final")
         if upl_sess:
             if st.button("确认恢复会话数据", width='stretch', key="btn_res_v8_final"):
                 try:
-                    st.session_state['datasets'] = pickle.load(upl_sess)
+                    st.session_state['datasets'] = import_session(upl_sess)
                     st.rerun()
                 except Exception as e:
                     st.error(f"文件加载失败: {e}")
@@ -349,28 +480,16 @@ def main():
     
     if upl_file:
         try:
-            # 预览数据以自动映射列名
-            if upl_file.name.lower().endswith(('.xlsx', '.xls')):
-                df_preview = pd.read_excel(upl_file)
-            else:
-                df_preview = pd.read_csv(upl_file)
-                
-            cols = df_preview.columns.tolist()
-            upl_file.seek(0)
-            cmap = {}
-            for c in cols:
-                cl = str(c).lower()
-                if 'time' in cl or 'date' in cl: cmap[c] = 'Time'
-                elif 'sp' in cl or 'set' in cl: cmap[c] = 'SP'
-                elif 'pv' in cl or 'process' in cl: cmap[c] = 'PV'
-                elif 'op' in cl or 'out' in cl: cmap[c] = 'OP'
-            
-            df = load_and_validate_data(upl_file, filename=upl_file.name, column_map=cmap)
+            # 按文件内容缓存解析，重跑时不再重复读取
+            df = load_uploaded_data(upl_file.getvalue(), upl_file.name)
             if st.sidebar.button("确认添加此轮数据并分析", width='stretch', key=f"btn_add_v8_{n_ds}"):
                 final_pid = PIDParams.from_pb(p_in, ti_in, td_in) if is_pb else PIDParams(p_in, ti_in, td_in)
+                # 预计算时间轴与 OP 列，模型拟合验证重绘时直接复用
+                t_sec = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().to_numpy()
                 new_e = {
-                    'name': upl_name, 'df': df, 'pid': final_pid,
-                    'metrics': calculate_metrics(df), 'ctrl_stats': analyze_controller_characteristics(df), 'model': None
+                    'name': upl_name, 'df': df, 'pid': final_pid, 'uid': uuid.uuid4().hex,
+                    't_sec': t_sec, 'op': df['OP'].to_numpy(),
+                    'metrics': calculate_metrics(df), 'ctrl_stats': analyze_controller_characteristics(df, t_sec=t_sec), 'model': None
                 }
                 st.session_state['datasets'].append(new_e)
                 st.rerun()
@@ -390,18 +509,27 @@ def main():
         # --- Tab 1: 进化看板 ---
         with t1:
             st.subheader("整定效果迭代演变看板")
-            h_list = []
-            for ds in st.session_state['datasets']:
-                p_val = ds['pid'].PB if is_pb else ds['pid'].Kp
-                row = {
-                    "阶段名称": ds['name'], p_label: p_val, "积分 Ti (s)": ds['pid'].Ti, "微分 Td (s)": ds['pid'].Td,
-                    "IAE 误差": ds['metrics'].iae, "超调量 (%)": ds['metrics'].overshoot
+            dss = st.session_state['datasets']
+            # 数据集与显示模式未变时直接复用上次构建的汇总表
+            h_key = (tuple(dataset_key(d) for d in dss), is_pb)
+            h_cache = st.session_state.get('_df_h_cache')
+            if h_cache is not None and h_cache[0] == h_key:
+                df_h = h_cache[1]
+            else:
+                n_h = len(dss)
+                h_cols = {
+                    "阶段名称": [d['name'] for d in dss],
+                    p_label: np.fromiter((d['pid'].PB if is_pb else d['pid'].Kp for d in dss), dtype=float, count=n_h),
+                    "积分 Ti (s)": np.fromiter((d['pid'].Ti for d in dss), dtype=float, count=n_h),
+                    "微分 Td (s)": np.fromiter((d['pid'].Td for d in dss), dtype=float, count=n_h),
+                    "IAE 误差": np.fromiter((d['metrics'].iae for d in dss), dtype=float, count=n_h),
+                    "超调量 (%)": np.fromiter((d['metrics'].overshoot for d in dss), dtype=float, count=n_h),
                 }
-                if 'ctrl_stats' in ds:
-                    row["输出动作变差(TV)"] = ds['ctrl_stats'].total_variation
-                    row["控制攻击性"] = ds['ctrl_stats'].aggressiveness
-                h_list.append(row)
-            df_h = pd.DataFrame(h_list)
+                if any('ctrl_stats' in d for d in dss):
+                    h_cols["输出动作变差(TV)"] = np.fromiter((d['ctrl_stats'].total_variation if 'ctrl_stats' in d else np.nan for d in dss), dtype=float, count=n_h)
+                    h_cols["控制攻击性"] = np.fromiter((d['ctrl_stats'].aggressiveness if 'ctrl_stats' in d else np.nan for d in dss), dtype=float, count=n_h)
+                df_h = pd.DataFrame(h_cols)
+                st.session_state['_df_h_cache'] = (h_key, df_h)
             st.dataframe(df_h, width='stretch')
             
             cg1, cg2 = st.columns(2)
@@ -432,7 +560,7 @@ def main():
             st.markdown(f"### 📍 当前正在查看分析: {cur_ds['name']}")
             
             with st.expander("🩺 回路健康诊断报告与统计", expanded=True):
-                res_diag = analyze_loop_health(cur_ds['df'])
+                res_diag = diagnose_cached(dataset_key(cur_ds), cur_ds['df'])
                 if res_diag.issues:
                     for iss in res_diag.issues: st.warning(f"⚠️ {iss}")
                 else:
@@ -446,7 +574,7 @@ def main():
                     cs3.metric("采样质量评分", f"{cur_ds['ctrl_stats'].data_quality_score:.0f}/100")
 
             with st.expander("🛠️ 阀门机械特性深度分析 (线性/冲刷/粘滞)", expanded=False):
-                v_health = analyze_advanced_valve_health(cur_ds['df'])
+                v_health = valve_health_cached(dataset_key(cur_ds), cur_ds['df'])
                 vh1, vh2 = st.columns(2)
                 with vh1:
                     st.metric("线性度评分", f"{v_health.linearity_score:.1f}/100")
@@ -474,7 +602,7 @@ def main():
                             m_result = fit_fopdt(cur_ds['df'])
                             cur_ds['model'] = m_result
                             st.success("模型辨识成功！")
-                            check_s = check_data_sufficiency(cur_ds['df'], m_result)
+                            check_s = check_data_sufficiency(cur_ds['df'], m_result, t_sec=get_cached_arrays(cur_ds)[0])
                             if not check_s.is_sufficient:
                                 st.warning(f"⚠️ {check_s.message}")
                                 for su in check_s.suggestions: st.markdown(f"- {su}")
@@ -483,8 +611,8 @@ def main():
                 if cur_ds['model']:
                     m_val = cur_ds['model']
                     st.info(f"**模型参数**: 增益 K={m_val.K:.4f}, 时间常数 τ={m_val.tau:.2f}s, 滞后 θ={m_val.theta:.2f}s")
-                    tf_v = (cur_ds['df']['Time'] - cur_ds['df']['Time'].iloc[0]).dt.total_seconds().values
-                    pp_v = m_val.predict(cur_ds['df']['OP'].values, tf_v)
+                    tf_v, op_v = get_cached_arrays(cur_ds)
+                    pp_v = predict_cached(dataset_key(cur_ds), (m_val.K, m_val.tau, m_val.theta, m_val.y0), op_v, tf_v)
                     ff_v = go.Figure()
                     ff_v.add_trace(go.Scatter(x=cur_ds['df']['Time'], y=cur_ds['df']['PV'], name='实际测量 PV'))
                     ff_v.add_trace(go.Scatter(x=cur_ds['df']['Time'], y=pp_v, name='模型拟合 PV', line=dict(dash='dash')))
@@ -513,11 +641,13 @@ def main():
                 
                 with st.expander("🔮 闭环响应仿真对比 (当前 vs 建议)", expanded=False):
                     sd_val = st.slider("仿真时长 (秒)", 100, 3600, int(cur_ds['model'].tau * 10), key=f"sli_v8_{sel_idx_back}")
-                    ts_ax = np.linspace(0, sd_val, 500); stm_pt = sd_val * 0.05
-                    def ssp_func(t): return 10.0 if t > stm_pt else 0.0
-                    rc_res = simulate_closed_loop(cur_ds['model'], sug_step.current_pid, ssp_func, ts_ax)
-                    rn_res = simulate_closed_loop(cur_ds['model'], sug_step.next_step_pid, ssp_func, ts_ax)
-                    rt_res = simulate_closed_loop(cur_ds['model'], sug_step.target_pid, ssp_func, ts_ax)
+                    stm_pt = sd_val * 0.05
+                    m_c = cur_ds['model']
+                    rc_res, rn_res, rt_res = [
+                        simulate_cached(m_c.K, m_c.tau, m_c.theta, m_c.y0, p.Kp, p.Ti, p.Td, sd_val, stm_pt)
+                        for p in (sug_step.current_pid, sug_step.next_step_pid, sug_step.target_pid)
+                    ]
+                    ts_ax = rc_res['Time']
                     fs_fig = go.Figure()
                     fs_fig.add_trace(go.Scatter(x=ts_ax, y=rc_res['SP'], name='设定值 SP 阶跃', line=dict(color='green', dash='dash')))
                     fs_fig.add_trace(go.Scatter(x=ts_ax, y=rc_res['PV'], name='当前参数响应(灰色)', line=dict(color='gray')))
@@ -528,11 +658,14 @@ def main():
 
         # --- Tab 3: 原始数据趋势分析 ---
         with t3:
-            s_name_raw = st.selectbox("选择要查看的原始响应阶段", [d['name'] for d in st.session_state['datasets']], key="sel_t3_v8")
-            s_data_raw = next(d for d in st.session_state['datasets'] if d['name'] == s_name_raw)
+            dss_raw = st.session_state['datasets']
+            s_idx_raw = st.selectbox("选择要查看的原始响应阶段", range(len(dss_raw)), 
+                                     format_func=lambda x: dss_raw[x]['name'], key="sel_t3_v8")
+            s_data_raw = dss_raw[s_idx_raw]
+            s_name_raw = s_data_raw['name']
             
             # 执行即时诊断以获取标注掩码
-            d_res_for_plot = analyze_loop_health(s_data_raw['df'])
+            d_res_for_plot = diagnose_cached(dataset_key(s_data_raw), s_data_raw['df'])
             
             st.plotly_chart(plot_time_series(s_data_raw['df'], title=f"{s_name_raw} - 异常特征点标注图", diag_res=d_res_for_plot), width='stretch')
             st.markdown("### 📊 该阶段性能核心指标 (KPI)")
@@ -3,6 +3,102 @@ import numpy as np
 from enum import Enum
 from dataclasses import dataclass, field
 from typing import List, Optional
+from scipy.ndimage import uniform_filter1d
+
+def _rolling_std(x: np.ndarray, w: int) -> np.ndarray:
+    """
+    Trailing-window sample std (ddof=1), equivalent to pd.Series(x).rolling(w).std() for i >= w-1.
+    Uses std = sqrt(E[x^2] - E[x]^2) over two uniform filters; the first w-1 entries
+    have no full window and are left for the caller to mask.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x.mean() # Center first to limit cancellation in E[x^2] - E[x]^2
+    origin = (w - 1) // 2 # Shift the window so it ends at the current sample
+    m = uniform_filter1d(x, w, origin=origin)
+    m2 = uniform_filter1d(x * x, w, origin=origin)
+    return np.sqrt(np.maximum(m2 - m * m, 0.0) * (w / (w - 1)))
+
+def _stuck_mask(op: np.ndarray, pv: np.ndarray, w: int, op_thresh: float, pv_thresh: float) -> np.ndarray:
+    """
+    Samples where the trailing w-window OP std exceeds op_thresh while PV std stays below pv_thresh.
+    The w-1 warm-up samples are False, so no NaN ever reaches the comparisons.
+    """
+    mask = (_rolling_std(op, w) > op_thresh) & (_rolling_std(pv, w) < pv_thresh)
+    mask[:w - 1] = False
+    return mask
+
+def _centered_mean(x: np.ndarray, w: int) -> np.ndarray:
+    """
+    Centered moving average for odd w, equivalent to rolling(w, center=True).mean().fillna(x):
+    the w//2 samples at each edge without a full window keep their raw value.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    offset = x.mean() if len(x) > 0 else 0.0
+    out = uniform_filter1d(x - offset, w) + offset
+    h = w // 2
+    out[:h] = x[:h]
+    out[len(x) - h:] = x[len(x) - h:]
+    return out
+
+def _first_severe_overshoot(sp: np.ndarray, pv: np.ndarray, step_indices: np.ndarray) -> Optional[float]:
+    """
+    Return overshoot / |step| for the first SP step whose response overshoots by more than 20%, else None.
+    """
+    n = len(sp)
+    for idx in step_indices:
+        # Define window after step: e.g. 50 samples
+        end_idx = min(idx + 50, n)
+        if end_idx <= idx + 5:
+            continue
+        target_sp = sp[end_idx - 1] # Assuming step to a new level
+        
+        # Step size
+        step_size = target_sp - sp[idx - 1]
+        if abs(step_size) < 1e-3: continue
+
+        # Max deviation from target
+        if step_size > 0:
+            overshoot = pv[idx:end_idx].max() - target_sp
+        else:
+            overshoot = target_sp - pv[idx:end_idx].min()
+        if overshoot > 0.2 * abs(step_size):
+            return overshoot / abs(step_size)
+    return None
+
+@dataclass
+class _LoopScan:
+    """Column reductions shared by several analyze_loop_health checks, computed once."""
+    sp: np.ndarray
+    pv: np.ndarray
+    op: np.ndarray
+    error: np.ndarray
+    sp_mean: float
+    sp_min: float
+    sp_max: float
+    op_min: float
+    op_max: float
+    op_range: float
+    sp_range: float
+    avg_error: float
+
+def _loop_scan(sp: np.ndarray, pv: np.ndarray, op: np.ndarray) -> _LoopScan:
+    sp = np.asarray(sp, dtype=np.float64)
+    pv = np.asarray(pv, dtype=np.float64)
+    op = np.asarray(op, dtype=np.float64)
+    error = sp - pv
+    if len(sp) == 0:
+        nan = float('nan')
+        return _LoopScan(sp, pv, op, error, nan, nan, nan, nan, nan, nan, nan, nan)
+    # One min and one max per column; the ranges are derived, not rescanned
+    sp_min, sp_max = sp.min(), sp.max()
+    op_min, op_max = op.min(), op.max()
+    return _LoopScan(
+        sp=sp, pv=pv, op=op, error=error,
+        sp_mean=sp.mean(), sp_min=sp_min, sp_max=sp_max,
+        op_min=op_min, op_max=op_max,
+        op_range=op_max - op_min, sp_range=sp_max - sp_min,
+        avg_error=error.mean()
+    )
 
 class HealthStatus(Enum):
     HEALTHY = "Healthy"
@@ -34,8 +130,8 @@ def analyze_advanced_valve_health(df: pd.DataFrame) -> ValveHealthReport:
     """
     Perform deep analysis of valve mechanical and static characteristics.
     """
-    op = df['OP'].values
-    pv = df['PV'].values
+    op = df['OP'].to_numpy(dtype=np.float64)
+    pv = df['PV'].to_numpy(dtype=np.float64)
     
     # 1. Gain Linearity Analysis (Binning OP)
     bins = np.arange(0, 101, 10)
@@ -68,22 +164,21 @@ def analyze_advanced_valve_health(df: pd.DataFrame) -> ValveHealthReport:
     # 3. Stiction Mapping
     # Identify samples where OP moves but PV stays still
     window = 5
-    op_std = df['OP'].rolling(window=window).std()
-    pv_std = df['PV'].rolling(window=window).std()
     
     # Heuristic: OP moves > 0.2% but PV moves < noise floor
-    stiction_mask = (op_std > 0.2) & (pv_std < 0.05)
-    stiction_mask = stiction_mask.fillna(False).values
+    stiction_mask = _stuck_mask(op, pv, window, 0.2, 0.05)
     stiction_ops = op[stiction_mask]
     
     stiction_zones = []
     if len(stiction_ops) > 0:
-        counts, edges = np.histogram(stiction_ops, bins=bins)
+        # Fixed 10%-wide bins: bin index by integer division, 100% belongs to the last bin
+        edges = bins.astype(float)
+        in_range = stiction_ops[(stiction_ops >= 0) & (stiction_ops <= 100)]
+        bin_idx = np.minimum((in_range // 10).astype(int), len(bins) - 2)
+        counts = np.bincount(bin_idx, minlength=len(bins) - 1)
         # Zones where more than 10% of total stiction points occur
-        for i in range(len(counts)):
-            if counts[i] > 0.1 * len(stiction_ops) and counts[i] > 5:
-                stiction_zones.append((edges[i], edges[high_idx if 'high_idx' in locals() else i+1])) # Fix logic later if needed
-                stiction_zones[-1] = (edges[i], edges[i+1]) # Corrected
+        for i in np.flatnonzero((counts > 0.1 * len(stiction_ops)) & (counts > 5)):
+            stiction_zones.append((edges[i], edges[i+1]))
 
     # 4. Generate Suggestions
     suggestions = []
@@ -107,40 +202,65 @@ def analyze_advanced_valve_health(df: pd.DataFrame) -> ValveHealthReport:
         raw_stiction_mask=stiction_mask
     )
 
-def analyze_loop_health(df: pd.DataFrame) -> DiagnosisResult:
+def analyze_loop_health(df: pd.DataFrame, level: str = "full", collect_masks: bool = True) -> DiagnosisResult:
     """
     Analyze PID loop health indicators: Saturation, Noise, Oscillation.
+    DataFrame adapter for analyze_loop_health_arrays.
     """
+    return analyze_loop_health_arrays(
+        df['SP'].to_numpy(dtype=np.float64),
+        df['PV'].to_numpy(dtype=np.float64),
+        df['OP'].to_numpy(dtype=np.float64),
+        level=level, collect_masks=collect_masks
+    )
+
+def analyze_loop_health_arrays(
+    sp: np.ndarray,
+    pv: np.ndarray,
+    op: np.ndarray,
+    level: str = "full",
+    collect_masks: bool = True
+) -> DiagnosisResult:
+    """
+    Analyze PID loop health from equally sampled SP/PV/OP arrays (all checks are sample-based).
+    level="fast" skips the overshoot and stiction checks once the loop is already CRITICAL,
+    and the stiction check whenever OP spans less than 1%.
+    collect_masks=False leaves the plotting masks (saturation/stiction) as None.
+    """
+    if level not in ("full", "fast"):
+        raise ValueError(f"未知的诊断级别 level={level!r}，应为 'full' 或 'fast'")
+
     issues = []
     status = HealthStatus.HEALTHY
     details = {}
 
-    # Common parameters
-    sp_mean = df['SP'].mean() if len(df) > 0 else 100.0
+    # Common parameters: one scan of the raw columns, reused by every check below
+    scan = _loop_scan(sp, pv, op)
+    n = len(scan.sp)
+    error = scan.error
+    avg_error = scan.avg_error
+    sp_mean = scan.sp_mean if n > 0 else 100.0
     err_threshold = max(0.01 * abs(sp_mean), 0.5)
 
     # 1. Saturation Check
-    op_max = df['OP'].max()
-    op_min = df['OP'].min()
+    op_max = scan.op_max
+    op_min = scan.op_min
     
-    op_range = op_max - op_min
+    op_range = scan.op_range
     if op_range < 1e-6:
         op_range = 1.0
         
     tol = 0.01 * op_range
     if tol < 0.1: tol = 0.1 
     
-    error = df['SP'] - df['PV']
-    avg_error = error.mean()
-    
-    is_at_max = (df['OP'] >= op_max - tol)
-    is_at_min = (df['OP'] <= op_min + tol)
+    is_at_max = (scan.op >= op_max - tol)
+    is_at_min = (scan.op <= op_min + tol)
     
     high_sat_points = is_at_max & (error > err_threshold)
     low_sat_points = is_at_min & (error < -err_threshold)
-    sat_mask = (high_sat_points | low_sat_points).values
+    sat_mask = (high_sat_points | low_sat_points) if collect_masks else None
     
-    total_points = len(df)
+    total_points = n
     
     if total_points > 0:
         if high_sat_points.sum() / total_points > 0.1:
@@ -158,16 +278,13 @@ def analyze_loop_health(df: pd.DataFrame) -> DiagnosisResult:
             status = HealthStatus.WARNING
 
     # 2. Noise Check
-    pv = df['PV']
-    sp = df['SP']
+    smoothed_pv = _centered_mean(scan.pv, 5)
+    noise_signal = scan.pv - smoothed_pv
+    noise_std = noise_signal.std(ddof=1)
     
-    smoothed_pv = pv.rolling(window=5, center=True).mean().fillna(pv)
-    noise_signal = pv - smoothed_pv
-    noise_std = noise_signal.std()
-    
-    sp_range_val = sp.max() - sp.min()
+    sp_range_val = scan.sp_range
     if sp_range_val == 0:
-        sp_range_val = sp.mean() * 0.1
+        sp_range_val = scan.sp_mean * 0.1
         if sp_range_val == 0: sp_range_val = 1.0
 
     if (3 * noise_std) > (0.05 * sp_range_val):
@@ -179,20 +296,23 @@ def analyze_loop_health(df: pd.DataFrame) -> DiagnosisResult:
 
     # 3. Oscillation & Divergence
     # Analyze Error
-    zero_crossings = np.where(np.diff(np.signbit(error)))[0]
+    # Sign change between i and i+1 <=> sign bits differ
+    signs = np.signbit(error)
+    zero_crossings = np.flatnonzero(signs[1:] ^ signs[:-1])
     
     if len(zero_crossings) > 4:
-        peaks = []
-        for i in range(len(zero_crossings)-1):
-            start = zero_crossings[i]
-            end = zero_crossings[i+1]
-            segment = error.iloc[start:end].abs()
-            if len(segment) > 0:
-                peaks.append(segment.max())
+        # Peak |error| of each segment [zc[i], zc[i+1]) in a single C-level reduction
+        abs_error = np.abs(error[:zero_crossings[-1]])
+        peaks = np.maximum.reduceat(abs_error, zero_crossings[:-1])
         
         if len(peaks) >= 3:
-            x_idx = np.arange(len(peaks))
-            slope, _ = np.polyfit(x_idx, peaks, 1)
+            # Least-squares slope of peaks vs index, closed form for x = 0..n-1:
+            # Sxx = n(n^2-1)/12, Sxy = sum(x*y) - mean(x)*sum(y)
+            n_peaks = len(peaks)
+            x_idx = np.arange(n_peaks)
+            s_xx = n_peaks * (n_peaks * n_peaks - 1) / 12.0
+            s_xy = np.dot(x_idx, peaks) - 0.5 * (n_peaks - 1) * peaks.sum()
+            slope = s_xy / s_xx
             
             avg_peak = np.mean(peaks)
             
@@ -206,81 +326,56 @@ def analyze_loop_health(df: pd.DataFrame) -> DiagnosisResult:
 
     # 4. Steady State Error (Offset)
     # Check last 20% of data
-    last_window_size = int(len(df) * 0.2)
+    last_window_size = int(n * 0.2)
     if last_window_size > 5:
-        segment = df.iloc[-last_window_size:]
+        sp_segment = scan.sp[-last_window_size:]
         # Ensure SP is relatively constant in this window
-        if segment['SP'].std() < (0.01 * abs(sp_mean)):
+        if sp_segment.std(ddof=1) < (0.01 * abs(sp_mean)):
             # Robust mean of error
-            avg_segment_error = (segment['SP'] - segment['PV']).mean()
+            avg_segment_error = error[-last_window_size:].mean()
             # Threshold: 2% of SP
             if abs(avg_segment_error) > max(0.02 * abs(sp_mean), 1.0):
                  issues.append(f"存在稳态误差 (Offset): {avg_segment_error:.2f}")
                  if status != HealthStatus.CRITICAL:
                      status = HealthStatus.WARNING
 
-    # 5. Severe Overshoot
-    # Detect SP step changes
-    sp_diff = df['SP'].diff().abs()
-    # Step > 5% of SP Mean
-    step_thresh = 0.05 * abs(sp_mean)
-    step_indices = sp_diff[sp_diff > step_thresh].index
-    
-    for idx in step_indices:
-        # Define window after step: e.g. 50 samples
-        end_idx = min(idx + 50, len(df))
-        if end_idx > idx + 5:
-            window_sp = df['SP'].iloc[idx:end_idx]
-            window_pv = df['PV'].iloc[idx:end_idx]
-            target_sp = window_sp.iloc[-1] # Assuming step to a new level
-            
-            # Step size
-            step_size = target_sp - df['SP'].iloc[idx-1]
-            if abs(step_size) < 1e-3: continue
+    # Fast mode: the remaining checks cannot change a CRITICAL verdict
+    skip_remaining = level == "fast" and status == HealthStatus.CRITICAL
+    if skip_remaining and not collect_masks:
+        return DiagnosisResult(status=status, issues=issues, details=details)
 
-            # Max deviation from target
-            if step_size > 0:
-                max_pv = window_pv.max()
-                overshoot = max_pv - target_sp
-                if overshoot > 0.2 * step_size:
-                    issues.append(f"检测到严重超调 (>{overshoot/step_size*100:.1f}%)")
-                    if status != HealthStatus.CRITICAL:
-                        status = HealthStatus.WARNING
-                    break
-            else:
-                min_pv = window_pv.min()
-                overshoot = target_sp - min_pv
-                if overshoot > 0.2 * abs(step_size):
-                    issues.append(f"检测到严重超调 (>{overshoot/abs(step_size)*100:.1f}%)")
-                    if status != HealthStatus.CRITICAL:
-                         status = HealthStatus.WARNING
-                    break
+    # 5. Severe Overshoot
+    # Detect SP step changes: Step > 5% of SP Mean
+    if not skip_remaining:
+        step_thresh = 0.05 * abs(sp_mean)
+        step_indices = np.flatnonzero(np.abs(np.diff(scan.sp)) > step_thresh) + 1
+        
+        overshoot_ratio = _first_severe_overshoot(scan.sp, scan.pv, step_indices)
+        if overshoot_ratio is not None:
+            issues.append(f"检测到严重超调 (>{overshoot_ratio*100:.1f}%)")
+            if status != HealthStatus.CRITICAL:
+                status = HealthStatus.WARNING
 
     # 6. Valve Stiction / Stick-Slip
+    # Fast mode also skips it when the valve never moves by more than 1%
     window_size = 5
-    if len(df) > window_size * 2:
-        op_std = df['OP'].rolling(window=window_size).std()
-        pv_std = df['PV'].rolling(window=window_size).std()
-        op_moving = op_std > (0.005 * op_range) 
-        pv_stuck = pv_std < (0.001 * sp_range_val)
-        stiction_candidates = op_moving & pv_stuck
-        if stiction_candidates.sum() > (0.05 * len(df)):
+    stiction_candidates = None
+    if n > window_size * 2 and level == "fast" and scan.op_range < 1.0:
+        stiction_candidates = np.zeros(n, dtype=bool)
+    elif n > window_size * 2:
+        # OP moving while PV stuck; with skip_remaining only the plotting mask is needed
+        stiction_candidates = _stuck_mask(scan.op, scan.pv, window_size, 0.005 * op_range, 0.001 * sp_range_val)
+        if not skip_remaining and stiction_candidates.sum() > (0.05 * n):
              issues.append("疑似阀门粘滞 (Stiction): 输出变化但PV响应迟滞")
              if status != HealthStatus.CRITICAL:
                  status = HealthStatus.WARNING
 
-        return DiagnosisResult(
-
-            status=status, 
-
-            issues=issues, 
-
-            details=details,
-
-            saturation_mask=sat_mask,
-
-            stiction_mask=stiction_candidates.fillna(False).values
-
-        )
+    return DiagnosisResult(
+        status=status, 
+        issues=issues, 
+        details=details,
+        saturation_mask=sat_mask,
+        stiction_mask=stiction_candidates if collect_masks else None
+    )
 
     
\ No newline at end of file
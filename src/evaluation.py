@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from scipy.integrate import trapezoid
 from dataclasses import dataclass
 
 @dataclass
@@ -14,44 +15,46 @@ def calculate_metrics(df: pd.DataFrame) -> PerformanceMetrics:
     Calculate control loop performance metrics.
     """
     # Ensure sorted by time
-    df = df.sort_values('Time')
+    if not df['Time'].is_monotonic_increasing:
+        df = df.sort_values('Time')
     
-    # Calculate dt in seconds
-    t_sec = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().values
-    dt = np.diff(t_sec)
-    # Append last dt to match length
-    dt = np.append(dt, dt[-1] if len(dt) > 0 else 1.0)
+    # Calculate dt in seconds from the integer nanosecond view
+    t_ns = df['Time'].values.astype('datetime64[ns]', copy=False).view('i8')
+    t_sec = (t_ns - t_ns[0]) / 1e9
     
-    error = df['SP'] - df['PV']
+    sp = df['SP'].to_numpy(dtype=np.float64)
+    pv = df['PV'].to_numpy(dtype=np.float64)
+    error = sp - pv
     abs_error = np.abs(error)
     squared_error = error ** 2
     
-    # IAE = Sum(|e| * dt)
-    iae = np.sum(abs_error * dt)
+    # IAE = Integral(|e| dt), trapezoidal rule over the actual timestamps
+    iae = trapezoid(abs_error, t_sec)
     
-    # ISE = Sum(e^2 * dt)
-    ise = np.sum(squared_error * dt)
+    # ISE = Integral(e^2 dt)
+    ise = trapezoid(squared_error, t_sec)
     
     # Overshoot & Settling Time Analysis
     # This is complex for general data (might have multiple steps).
     # We analyze the largest step change found in SP.
     
-    sp_diff = df['SP'].diff().abs()
-    if sp_diff.max() > 0:
-        step_idx = sp_diff.idxmax()
-        step_time = df['Time'].iloc[step_idx]
-        step_size = df['SP'].iloc[step_idx] - df['SP'].iloc[step_idx-1]
-        target_sp = df['SP'].iloc[step_idx]
+    sp_diff = np.abs(np.diff(sp))
+    if sp_diff.size > 0 and sp_diff.max() > 0:
+        # Position of the largest step (diff[i] is the change into sample i+1)
+        step_idx = int(np.argmax(sp_diff)) + 1
+        step_size = sp[step_idx] - sp[step_idx-1]
+        target_sp = sp[step_idx]
         
         # Analyze data AFTER the step
-        post_step = df.iloc[step_idx:]
-        if len(post_step) > 5:
+        post_pv = pv[step_idx:]
+        post_t = t_sec[step_idx:]
+        if len(post_pv) > 5:
             # Overshoot
             if step_size > 0:
-                max_pv = post_step['PV'].max()
+                max_pv = post_pv.max()
                 overshoot_val = max(0, max_pv - target_sp)
             else:
-                min_pv = post_step['PV'].min()
+                min_pv = post_pv.min()
                 overshoot_val = max(0, target_sp - min_pv)
             
             overshoot_pct = (overshoot_val / abs(step_size)) * 100.0 if abs(step_size) > 1e-6 else 0.0
@@ -59,11 +62,10 @@ def calculate_metrics(df: pd.DataFrame) -> PerformanceMetrics:
             # Settling Time (Time to stay within 5% of target)
             band = 0.05 * abs(step_size)
             # Find last time PV was OUTSIDE the band
-            outside_band = post_step[np.abs(post_step['PV'] - target_sp) > band]
+            outside_band = np.flatnonzero(np.abs(post_pv - target_sp) > band)
             
-            if not outside_band.empty:
-                last_outside_time = outside_band['Time'].iloc[-1]
-                settling_time = (last_outside_time - step_time).total_seconds()
+            if outside_band.size > 0:
+                settling_time = post_t[outside_band[-1]] - post_t[0]
             else:
                 # Never went outside? Already settled?
                 settling_time = 0.0
@@ -1,4 +1,6 @@
 import pandas as pd
+import numpy as np
+from pandas.api.types import is_numeric_dtype
 from typing import Dict, IO, Union
 import os
 
@@ -6,6 +8,53 @@ class IngestionError(Exception):
     """Custom exception for data ingestion errors."""
     pass
 
+def _rewind(file_buffer: Union[str, IO]) -> None:
+    """Reset a file-like buffer so a fallback reader starts from the beginning."""
+    if hasattr(file_buffer, 'seek'):
+        file_buffer.seek(0)
+
+def _read_csv_arrow(file_buffer: Union[str, IO], time_col: str) -> pd.DataFrame:
+    """
+    Read a CSV with the multithreaded PyArrow reader, keeping the raw Time strings out of
+    its type inference: PyArrow would convert UTC offsets to UTC and turn time-only values
+    into time64, so _parse_time must remain the only datetime conversion.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    options = pa_csv.ConvertOptions(column_types={time_col: pa.string()})
+    return pa_csv.read_csv(file_buffer, convert_options=options).to_pandas()
+
+def _read_table(file_buffer: Union[str, IO], ext: str, time_col: str = 'Time') -> pd.DataFrame:
+    """
+    Read the raw table with the fastest available parser, falling back to pandas' defaults.
+    CSV: multithreaded PyArrow reader. Excel: Rust-based calamine engine (python-calamine).
+    """
+    if ext in ['.xlsx', '.xls']:
+        try:
+            return pd.read_excel(file_buffer, engine='calamine')
+        except (ImportError, ValueError):
+            # python-calamine missing, or pandas < 2.2 without the calamine engine
+            _rewind(file_buffer)
+            return pd.read_excel(file_buffer)
+
+    try:
+        return _read_csv_arrow(file_buffer, time_col)
+    except (ImportError, TypeError, ValueError):
+        # pyarrow missing, a text-mode buffer, or a file it cannot parse: use the C engine
+        _rewind(file_buffer)
+        return pd.read_csv(file_buffer)
+
+def _parse_time(col: pd.Series) -> pd.Series:
+    """
+    Convert the Time column with the strict ISO 8601 fast parser, falling back to
+    pandas' default inference (which raises on inconsistent formats instead of guessing per row).
+    """
+    try:
+        return pd.to_datetime(col, format='ISO8601', cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(col, cache=True)
+
 def load_and_validate_data(
     file_buffer: Union[str, IO],
     filename: str = "",
@@ -17,13 +66,14 @@ def load_and_validate_data(
     try:
         # Determine file type
         ext = os.path.splitext(filename)[1].lower() if filename else ""
+        # Source column that becomes 'Time' after mapping
+        time_col = next((src for src, dst in (column_map or {}).items() if dst == 'Time'), 'Time')
         
-        if ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_buffer)
-        else:
-            # Default to CSV
-            df = pd.read_csv(file_buffer)
+        # Default to CSV
+        df = _read_table(file_buffer, ext, time_col)
             
+    except pd.errors.EmptyDataError:
+        raise IngestionError("提供的文件为空。")
     except Exception as e:
         raise IngestionError(f"文件读取失败: {str(e)}")
 
@@ -46,13 +96,18 @@ def load_and_validate_data(
 
     # Ensure Time is datetime with high precision
     try:
-        df['Time'] = pd.to_datetime(df['Time'])
+        df['Time'] = _parse_time(df['Time'])
     except Exception:
          raise IngestionError("无法将 'Time' 列转换为日期时间格式。请确保时间列包含完整的日期和时间（包含秒）。")
          
     # Ensure numeric types
     for col in ['SP', 'PV', 'OP']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+        s = df[col]
+        if is_numeric_dtype(s):
+            # Already parsed as numbers: a cheap cast, no element-wise coercion
+            df[col] = s.astype(np.float64)
+        else:
+            df[col] = pd.to_numeric(s, errors='coerce')
     
     # Drop rows with NaNs in critical columns
     original_len = len(df)
@@ -1,9 +1,35 @@
+import math
 import numpy as np
 from scipy.optimize import minimize
+from scipy.signal import lfilter
 from dataclasses import dataclass
 from typing import Tuple, Optional
 import pandas as pd
 
+def _delayed_input_deviation(op: np.ndarray, delay_steps: int) -> np.ndarray:
+    """
+    OP deviation from its initial value as seen by the process, i.e. shifted by the dead time.
+    """
+    n = len(op)
+    if delay_steps <= 0:
+        # No dead time: plain deviation, no zero padding or shifted copy
+        return op - op[0]
+    d = min(delay_steps, n)
+    du = np.zeros(n)
+    du[d:] = op[:n - d] - op[0]
+    return du
+
+def _zoh_response(du: np.ndarray, dt: float, K: float, tau: float, y0: float) -> np.ndarray:
+    """
+    ZOH recurrence y[k] = a * y[k-1] + (1 - a) * (K * du[k-1] + y0), a = exp(-dt / tau).
+    In deviation form y[k] - y0 is a first-order IIR filter of du, evaluated by lfilter in C.
+    """
+    # Ensure tau is not too small to prevent division by near-zero (infinite speed)
+    a = math.exp(-dt / max(float(tau), 0.1))
+    
+    # (y - y0)[k] = a * (y - y0)[k-1] + (1 - a) * K * du[k-1], starting from 0
+    return lfilter([0.0, (1.0 - a) * K], [1.0, -a], du) + y0
+
 @dataclass
 class FOPDTModel:
     K: float    # Process Gain
@@ -13,50 +39,23 @@ class FOPDTModel:
 
     def predict(self, op_array: np.ndarray, t_array: np.ndarray) -> np.ndarray:
         """
-        Simulate FOPDT response for a given OP sequence with numerical stability.
+        Simulate FOPDT response for a given OP sequence.
+        Uses the exact zero-order-hold discretization, which is stable for any tau > 0:
+        y[k] = a * y[k-1] + (1 - a) * (K * (u[k-1-d] - u0) + y0),  a = exp(-dt / tau)
         """
-        dt = t_array[1] - t_array[0]
-        n = len(t_array)
-        pv_pred = np.zeros(n)
-        pv_pred[0] = self.y0
+        dt = float(t_array[1] - t_array[0])
         
         # Delay in steps
         delay_steps = int(max(0, self.theta) / dt)
-        op_base = op_array[0]
-        
-        for k in range(1, n):
-            op_idx = k - 1 - delay_steps
-            op_val = op_array[op_idx] if op_idx >= 0 else op_base
-            
-            # Prediction using Euler method
-            # tau * dy/dt = K * (u - u0) - (y - y0)
-            
-            # Ensure tau is not too small to prevent division by near-zero (infinite speed)
-            safe_tau = max(self.tau, 0.1)
-            
-            driving_force = self.K * (op_val - op_base) - (pv_pred[k-1] - self.y0)
-            
-            # Check for non-finite values before calculation
-            if not np.isfinite(driving_force):
-                driving_force = 0.0
-                
-            change = (driving_force / safe_tau) * dt
-            
-            # Robustness: Clip change to prevent numerical explosion during optimization iterations
-            change = np.clip(change, -1e5, 1e5)
-            
-            new_val = pv_pred[k-1] + change
-            
-            # Final sanity check for NaN/Inf
-            pv_pred[k] = new_val if np.isfinite(new_val) else pv_pred[k-1]
-            
-        return pv_pred
+        du = _delayed_input_deviation(np.asarray(op_array, dtype=float), delay_steps)
+        return _zoh_response(du, dt, self.K, self.tau, self.y0)
 
 def fit_fopdt(df: pd.DataFrame) -> FOPDTModel:
     """
     Fit FOPDT model to Time/OP/PV data with improved stability.
     """
-    t = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().values
+    t_ns = df['Time'].values.astype('datetime64[ns]', copy=False).view('i8')
+    t = (t_ns - t_ns[0]) / 1e9
     op = df['OP'].values
     pv = df['PV'].values
     
@@ -87,11 +86,16 @@ def fit_fopdt(df: pd.DataFrame) -> FOPDTModel:
     # Grid scan for Dead Time (Theta) to handle non-convexity
     theta_candidates = np.linspace(0, duration * 0.4, 15)
     
-    for theta_test in theta_candidates:
+    # Theta only shifts the input: build every candidate's delayed input once,
+    # so the optimizer iterations below only rerun the ZOH scan
+    op_f = np.asarray(op, dtype=float)
+    delays = (np.clip(theta_candidates, 0, None) / dt).astype(int)
+    du_grid = np.stack([_delayed_input_deviation(op_f, d) for d in delays])
+    
+    for theta_test, du in zip(theta_candidates, du_grid):
         def objective_fixed_theta(x):
             K_i, tau_i, y0_i = x
-            model = FOPDTModel(K_i, tau_i, theta_test, y0_i)
-            pv_pred = model.predict(op, t)
+            pv_pred = _zoh_response(du, dt, K_i, tau_i, y0_i)
             
             error = pv - pv_pred
             # Clip error to avoid square overflow (max ~1e308 for float64)
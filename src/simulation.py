@@ -1,89 +1,198 @@
 import numpy as np
+from collections import deque
+from typing import Sequence, Union
 from src.modeling import FOPDTModel
 from src.tuning import PIDParams
 
+def _setpoint_array(setpoint_func: Union[callable, np.ndarray], t_span: np.ndarray) -> np.ndarray:
+    """
+    SP profile aligned with t_span. A callable is first tried on the whole time axis at once;
+    scalar-only callables (or ones not returning one value per sample) are evaluated per step.
+    """
+    n = len(t_span)
+    if not callable(setpoint_func):
+        sp = np.array(setpoint_func, dtype=float)
+        if sp.shape != (n,):
+            raise ValueError(f"SP 数组形状 {sp.shape} 与时间轴长度 {n} 不一致")
+        return sp
+    try:
+        sp = np.asarray(setpoint_func(t_span), dtype=np.float64)
+        if sp.shape == (n,):
+            return sp
+    except Exception:
+        pass
+    return np.fromiter((setpoint_func(t) for t in t_span), dtype=np.float64, count=n)
+
+def _simulate_kernel(
+    K: float, tau: float, theta: float, y0: float,
+    Kp: float, Ti: float, Td: float,
+    sp_arr: np.ndarray, t_span: np.ndarray,
+    op_lo: float, op_hi: float
+) -> tuple:
+    """
+    Step loop of simulate_closed_loop on plain floats and lists: no attribute lookups,
+    no callables and no per-element NumPy indexing inside the loop. Returns (pv, op) arrays.
+    """
+    dt = float(t_span[1] - t_span[0])
+    n = len(t_span)
+    sp = sp_arr.tolist()
+    
+    pv = [0.0] * n
+    op = [0.0] * n
+    
+    integral = 0.0
+    
+    # Loop invariants: gains and model coefficient computed once
+    has_integral = Ti > 0
+    has_derivative = Td > 0
+    ki = Kp * dt / Ti if has_integral else 0.0
+    kd = Kp * Td / dt if has_derivative else 0.0
+    inv_tau_dt = dt / tau
+    
+    # Model dead time in steps. Only the last delay_steps + 1 OPs are ever needed: a FIFO
+    # ring preloaded with zeros (initial condition in deviation variables) always has
+    # OP[k-1-d] at its head, so the delayed read needs no bounds check, with or without dead time.
+    delay_steps = int(max(0, theta) / dt)
+    op_ring = deque([0.0] * (delay_steps + 1))
+    
+    # PV[k-1] and the previous error stay in locals instead of being re-read from the lists.
+    # At k = 0 the zero OP history leaves PV at y0, and seeding prev_error with the
+    # initial error makes the first derivative term zero, so no step needs a k > 0 test.
+    pv_prev = y0
+    prev_error = sp[0] - y0
+    
+    for k in range(n):
+        # 1. Read PV (from Process Model)
+        # Model dynamics, PV[k] based on PAST (delayed) OP:
+        # PV[k] = PV[k-1] + (dt/tau) * ( K * OP[k-1-d] - (PV[k-1]-y0) )
+        pv_k = pv_prev + (K * op_ring.popleft() - (pv_prev - y0)) * inv_tau_dt
+        pv[k] = pv_k
+        pv_prev = pv_k
+
+        # 2. Calculate PID Output
+        error = sp[k] - pv_k
+        
+        # P
+        P = Kp * error
+        
+        # I
+        if has_integral:
+            integral += ki * error
+        
+        # D (Simple backward difference)
+        D = kd * (error - prev_error) if has_derivative else 0.0
+            
+        raw_op = P + integral + D
+        
+        # Clamp OP, with back-calculation anti-windup inside the saturated branches:
+        # the clamp comparison already tells us the output saturated, no second test needed.
+        # Back-calculate integral to be consistent with clamped OP: clamped_op = P + I_new + D
+        if raw_op > op_hi:
+            clamped_op = op_hi
+            if has_integral:
+                integral = op_hi - P - D
+        elif raw_op < op_lo:
+            clamped_op = op_lo
+            if has_integral:
+                integral = op_lo - P - D
+        else:
+            clamped_op = raw_op
+            
+        op_ring.append(clamped_op)
+        op[k] = clamped_op
+        prev_error = error
+        
+    return np.array(pv, dtype=float), np.array(op, dtype=float)
+
 def simulate_closed_loop(
     model: FOPDTModel,
     pid: PIDParams,
-    setpoint_func: callable,
+    setpoint_func: Union[callable, np.ndarray],
     t_span: np.ndarray,
     op_limits: tuple = (0, 100)
 ) -> dict:
     """
     Simulate closed-loop PID control.
+    setpoint_func may be a precomputed SP array aligned with t_span, or a callable sp(t).
+    Callables are first called once with the whole t_span array, so an array-aware one
+    (e.g. lambda t: np.where(t >= 10, 10.0, 0.0)) costs a single NumPy call; scalar-only
+    callables still work and are evaluated per time step.
     Returns dictionary with time, sp, pv, op arrays.
     """
+    # Evaluate the setpoint up front so the step loop only sees arrays
+    sp = _setpoint_array(setpoint_func, t_span)
+    
+    # Starting at 0 output in deviation variables: steady state OP = (y0 - y0) / K = 0
+    pv, op = _simulate_kernel(
+        float(model.K), float(model.tau), float(model.theta), float(model.y0),
+        float(pid.Kp), float(pid.Ti), float(pid.Td),
+        sp, t_span, float(op_limits[0]), float(op_limits[1])
+    )
+    return {'Time': t_span, 'SP': sp, 'PV': pv, 'OP': op}
+
+def simulate_closed_loop_batch(
+    model: FOPDTModel,
+    pids: Sequence[PIDParams],
+    setpoint_func: Union[callable, np.ndarray],
+    t_span: np.ndarray,
+    op_limits: tuple = (0, 100)
+) -> dict:
+    """
+    Simulate several PID tunings against the same model in one pass.
+    Each timestep advances all loops at once, with the PID state held as length-M arrays.
+    Returns dictionary with Time/SP of shape (n,) and PV/OP of shape (M, n); row i matches
+    simulate_closed_loop(model, pids[i], ...).
+    Only pays off for large sweeps (on the order of 100+ tunings); for a handful of tunings
+    the per-step NumPy overhead makes separate simulate_closed_loop calls faster.
+    """
     dt = t_span[1] - t_span[0]
     n = len(t_span)
+    m = len(pids)
     
-    pv = np.zeros(n)
-    op = np.zeros(n)
-    sp = np.zeros(n)
+    sp = _setpoint_array(setpoint_func, t_span)
     
-    pv[0] = model.y0
-    op[0] = 0 # Assume starting at 0 output or need bias? 
-    # Usually steady state: OP = (y0 - y0) / K = 0 deviation.
-    # Let's assume deviation variables.
+    Kp = np.array([p.Kp for p in pids], dtype=float)
+    Ti = np.array([p.Ti for p in pids], dtype=float)
+    Td = np.array([p.Td for p in pids], dtype=float)
     
-    integral = 0.0
-    prev_error = 0.0
+    # Per-loop gains; disabled I/D terms get zero gain
+    has_integral = Ti > 0
+    ki = np.where(has_integral, Kp * dt / np.where(has_integral, Ti, 1.0), 0.0)
+    kd = np.where(Td > 0, Kp * Td / dt, 0.0)
     
-    # Delay buffer for model
+    pv = np.zeros((m, n))
+    op = np.zeros((m, n))
+    
+    integral = np.zeros(m)
+    prev_error = np.zeros(m)
     delay_steps = int(max(0, model.theta) / dt)
-    op_buffer = np.zeros(n + delay_steps) # Buffer to store past OPs
+    K, y0 = model.K, model.y0
+    inv_tau_dt = dt / model.tau
     
     for k in range(n):
-        t = t_span[k]
-        sp_val = setpoint_func(t)
-        sp[k] = sp_val
-        
         # 1. Read PV (from Process Model)
-        # PV[k] based on PAST OP
         if k > 0:
-            # Model dynamics:
-            # PV[k] = PV[k-1] + (dt/tau) * ( K * OP[k-1-d] - (PV[k-1]-y0) )
-            
-            # Retrieve delayed OP
             delayed_idx = k - 1 - delay_steps
-            if delayed_idx < 0:
-                op_delayed = 0 # Initial condition (deviation)
-            else:
-                op_delayed = op[delayed_idx]
-            
-            driving_force = model.K * op_delayed - (pv[k-1] - model.y0)
-            pv[k] = pv[k-1] + (driving_force / model.tau) * dt
+            op_delayed = op[:, delayed_idx] if delayed_idx >= 0 else 0.0
+            driving_force = K * op_delayed - (pv[:, k-1] - y0)
+            pv[:, k] = pv[:, k-1] + driving_force * inv_tau_dt
         else:
-            pv[k] = model.y0
-
-        # 2. Calculate PID Output
-        error = sp[k] - pv[k]
-        
-        # P
-        P = pid.Kp * error
+            pv[:, k] = y0
         
-        # I
-        if pid.Ti > 0:
-            integral += (pid.Kp * dt / pid.Ti) * error
+        # 2. Calculate PID Output
+        error = sp[k] - pv[:, k]
+        P = Kp * error
+        integral += ki * error
+        D = kd * (error - prev_error) if k > 0 else 0.0
         
-        # D (Simple backward difference)
-        D = 0
-        if pid.Td > 0 and k > 0:
-            D = (pid.Kp * pid.Td / dt) * (error - prev_error)
-            
         raw_op = P + integral + D
+        clamped_op = np.clip(raw_op, op_limits[0], op_limits[1])
         
-        # Clamp OP
-        clamped_op = max(op_limits[0], min(op_limits[1], raw_op))
+        # Anti-windup (back-calculation) only where the loop has an integrator
+        saturated = has_integral & (clamped_op != raw_op)
+        integral = np.where(saturated, clamped_op - P - D, integral)
         
-        # Anti-windup (Clamping)
-        # If clamped, stop integrating in that direction?
-        # Simple back-calculation or conditional integration is better, but here just clamping integral implies:
-        if pid.Ti > 0 and (clamped_op != raw_op):
-            # Back-calculate integral to be consistent with clamped OP
-            # clamped_op = P + I_new + D
-            integral = clamped_op - P - D
-            
-        op[k] = clamped_op
+        op[:, k] = clamped_op
         prev_error = error
         
     return {'Time': t_span, 'SP': sp, 'PV': pv, 'OP': op}
@@ -1,17 +1,24 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+import numpy as np
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Dict, Any, Tuple
 from src.modeling import FOPDTModel
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PIDParams:
     Kp: float
     Ti: float
     Td: float = 0.0
+    _pb: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Immutable, so PB is computed once instead of on every access
+        object.__setattr__(self, '_pb', 100.0 / self.Kp if abs(self.Kp) > 1e-9 else 9999.9)
 
     @property
     def PB(self) -> float:
-        """Calculate Proportional Band (PB). PB = 100 / Kp."""
-        return 100.0 / self.Kp if abs(self.Kp) > 1e-9 else 9999.9
+        """Proportional Band (PB). PB = 100 / Kp."""
+        return self._pb
 
     @staticmethod
     def from_pb(pb: float, ti: float, td: float = 0.0) -> 'PIDParams':
@@ -19,20 +26,46 @@ class PIDParams:
         kp = 100.0 / pb if abs(pb) > 1e-9 else 0.0
         return PIDParams(Kp=kp, Ti=ti, Td=td)
 
-@dataclass
+def _pid_getstate(self) -> tuple:
+    return (self.Kp, self.Ti, self.Td)
+
+def _pid_setstate(self, state) -> None:
+    # Sessions saved before PIDParams used __slots__ pickle a plain attribute dict
+    if isinstance(state, dict):
+        state = (state['Kp'], state['Ti'], state.get('Td', 0.0))
+    for name, value in zip(('Kp', 'Ti', 'Td'), state):
+        object.__setattr__(self, name, value)
+    self.__post_init__()
+
+# Assigned after decoration: on Python 3.10, dataclass(frozen=True, slots=True)
+# overwrites any __getstate__/__setstate__ defined in the class body.
+PIDParams.__getstate__ = _pid_getstate
+PIDParams.__setstate__ = _pid_setstate
+
+# Field accessors for get_delta_desc, built once instead of a getattr(obj, name) per lookup
+_PID_FIELD_GETTERS = {label: attrgetter(label) for label in ('Kp', 'Ti', 'Td', 'PB')}
+
+@dataclass(slots=True)
 class TuningSuggestion:
     current_pid: PIDParams
     target_pid: PIDParams     # The theoretical best
     next_step_pid: PIDParams  # The safe step
-    warnings: list[str] = None
+    limited_steps: list[tuple] = field(default_factory=list) # (label, diff, curr) for each rate-limited parameter
+
+    @property
+    def warnings(self) -> list[str]:
+        """Rate-limit warnings, formatted only when someone reads them."""
+        return [f"{label} 调整幅度受限 (理论需 {(diff/curr)*100.0:+.1f}%)"
+                for label, diff, curr in self.limited_steps]
     
     def get_delta_desc(self, label: str, mode: str = "Kp") -> str:
         """Dynamically generate description based on current mode."""
         is_pb = (mode == "PB" and label == "Kp")
         
-        c_val = self.current_pid.PB if is_pb else getattr(self.current_pid, label)
-        n_val = self.next_step_pid.PB if is_pb else getattr(self.next_step_pid, label)
-        t_val = self.target_pid.PB if is_pb else getattr(self.target_pid, label)
+        get = _PID_FIELD_GETTERS['PB' if is_pb else label]
+        c_val = get(self.current_pid)
+        n_val = get(self.next_step_pid)
+        t_val = get(self.target_pid)
         
         if c_val == 0 or (is_pb and c_val >= 9999.9):
             return f"0 -> {n_val:.4f} (初始设定)"
@@ -45,28 +78,100 @@ class TuningSuggestion:
         else:
             return f"{c_val:.4f} -> {n_val:.4f} (限制步长, 目标 {t_val:.4f})"
 
+    @property
+    def delta(self) -> Dict[str, str]:
+        """Change descriptions for all three parameters in Kp mode, keyed '<label>_desc'."""
+        return {f"{label}_desc": self.get_delta_desc(label) for label in ('Kp', 'Ti', 'Td')}
+
+class TuningHistory:
+    """
+    Column-wise (SoA) log of tuning suggestions: one contiguous float64 row per parameter
+    instead of a list of objects, e.g. np.diff(history.column('Kp_next')) for convergence plots.
+    The (9, cap) block grows by doubling; only the first `n` entries of each row are valid.
+    """
+    COLUMNS = ('Kp_cur', 'Ti_cur', 'Td_cur',
+               'Kp_tgt', 'Ti_tgt', 'Td_tgt',
+               'Kp_next', 'Ti_next', 'Td_next')
+    _ROW = {name: row for row, name in enumerate(COLUMNS)}
+
+    def __init__(self, cap: int = 128):
+        self.data = np.empty((len(self.COLUMNS), max(int(cap), 1)))
+        self.n = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def append(self, suggestion: TuningSuggestion) -> None:
+        cap = self.data.shape[1]
+        if self.n == cap:
+            grown = np.empty((len(self.COLUMNS), 2 * cap))
+            grown[:, :cap] = self.data
+            self.data = grown
+        cur, tgt, nxt = suggestion.current_pid, suggestion.target_pid, suggestion.next_step_pid
+        self.data[:, self.n] = (cur.Kp, cur.Ti, cur.Td,
+                                tgt.Kp, tgt.Ti, tgt.Td,
+                                nxt.Kp, nxt.Ti, nxt.Td)
+        self.n += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """View of the valid entries of one column."""
+        return self.data[self._ROW[name], :self.n]
+
 def calculate_imc_pid(model: FOPDTModel, aggressiveness: str = 'moderate') -> PIDParams:
     # ... (existing calculate_imc_pid code remains same)
     """
     Calculate PID parameters using SIMC rules.
     Aggressiveness: 'aggressive', 'moderate', 'conservative'
     """
-    # SIMC Rules
+    K, tau, theta = model.K, model.tau, model.theta
+    
+    # SIMC Rules (plain comparisons: no variadic max/min call)
     if aggressiveness == 'aggressive':
-        lambda_c = max(0.1 * model.tau, model.theta)
+        a, b = 0.1 * tau, theta
     elif aggressiveness == 'moderate':
-        lambda_c = max(0.5 * model.tau, 3 * model.theta)
+        a, b = 0.5 * tau, 3 * theta
     else: # conservative
-        lambda_c = max(1.0 * model.tau, 10 * model.theta)
+        a, b = 1.0 * tau, 10 * theta
+    lambda_c = a if a > b else b
         
-    if abs(model.K) < 1e-6:
+    if abs(K) < 1e-6:
         return PIDParams(0, 0, 0) # Cannot control
         
-    Kc = (1.0 / model.K) * (model.tau / (lambda_c + model.theta))
-    Ti = min(model.tau, 4 * (lambda_c + model.theta))
+    closed = lambda_c + theta
+    Kc = (1.0 / K) * (tau / closed)
+    ti_cap = 4 * closed
+    Ti = tau if tau < ti_cap else ti_cap
     
     return PIDParams(Kp=Kc, Ti=Ti, Td=0.0)
 
+def calculate_imc_pid_batch(
+    Ks: np.ndarray,
+    taus: np.ndarray,
+    thetas: np.ndarray,
+    aggressiveness: str = 'moderate'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized calculate_imc_pid over arrays of FOPDT models (e.g. gain/time-constant sweeps).
+    Returns (Kc, Ti) arrays; entries with |K| < 1e-6 get Kc = Ti = 0 like the scalar version.
+    """
+    K = np.asarray(Ks, dtype=np.float64)
+    tau = np.asarray(taus, dtype=np.float64)
+    theta = np.asarray(thetas, dtype=np.float64)
+    
+    # SIMC Rules
+    if aggressiveness == 'aggressive':
+        lambda_c = np.maximum(0.1 * tau, theta)
+    elif aggressiveness == 'moderate':
+        lambda_c = np.maximum(0.5 * tau, 3 * theta)
+    else: # conservative
+        lambda_c = np.maximum(1.0 * tau, 10 * theta)
+    
+    controllable = np.abs(K) >= 1e-6
+    safe_K = np.where(controllable, K, 1.0)
+    Kc = np.where(controllable, (1.0 / safe_K) * (tau / (lambda_c + theta)), 0.0)
+    Ti = np.where(controllable, np.minimum(tau, 4 * (lambda_c + theta)), 0.0)
+    return Kc, Ti
+
 def suggest_parameters(
 
     current_pid: PIDParams, 
@@ -85,7 +190,7 @@ def suggest_parameters(
 
     """
 
-    warnings = []
+    limited_steps = []
 
     
 
@@ -111,7 +216,7 @@ def suggest_parameters(
 
             step_sign = 1 if diff > 0 else -1
 
-            warnings.append(f"{label} 调整幅度受限 (理论需 {(diff/curr)*100.0:+.1f}%)")
+            limited_steps.append((label, diff, curr))
 
             return curr + max_step * step_sign
 
@@ -133,6 +238,6 @@ def suggest_parameters(
 
         next_step_pid=PIDParams(new_Kp, new_Ti, new_Td),
 
-        warnings=warnings
+        limited_steps=limited_steps
 
     )
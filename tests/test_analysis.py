@@ -59,3 +59,14 @@ def test_sufficiency_check_uneven_time():
     # Max sampling time should be large (~300s)
     assert stats.max_sampling_time > 290.0
     assert stats.data_quality_score < 90 # Should be penalized
+
+def test_controller_stats_with_cached_time_axis():
+    t = pd.date_range(start='2023-01-01', periods=61, freq='s')
+    op = np.array([50 if i%2==0 else 52 for i in range(61)])
+    df = pd.DataFrame({'Time': t, 'SP': np.zeros(61), 'PV': np.zeros(61), 'OP': op})
+    
+    t_sec = (df['Time'] - df['Time'].iloc[0]).dt.total_seconds().to_numpy()
+    cached = analyze_controller_characteristics(df, t_sec=t_sec)
+    fresh = analyze_controller_characteristics(df)
+    
+    assert cached == fresh
@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
-from src.diagnosis import analyze_loop_health, DiagnosisResult, HealthStatus
+from src.diagnosis import analyze_loop_health, analyze_loop_health_arrays, DiagnosisResult, HealthStatus
 
 @pytest.fixture
 def clean_data():
@@ -55,4 +55,56 @@ def test_oscillation_divergence():
     })
     result = analyze_loop_health(df)
     assert result.status == HealthStatus.CRITICAL
-    assert "检测到发散震荡" in result.issues
\ No newline at end of file
+    assert "检测到发散震荡" in result.issues
+
+
+def test_fast_level_skips_masks_when_critical():
+    t = pd.date_range(start='2023-01-01', periods=200, freq='s')
+    oscillation = np.sin(np.linspace(0, 20, 200)) * np.linspace(1, 10, 200)
+    df = pd.DataFrame({
+        'Time': t,
+        'SP': 50.0,
+        'PV': 50.0 + oscillation,
+        'OP': 25.0
+    })
+    full = analyze_loop_health(df)
+    fast = analyze_loop_health(df, level="fast", collect_masks=False)
+    assert fast.status == full.status == HealthStatus.CRITICAL
+    assert "检测到发散震荡" in fast.issues
+    assert fast.saturation_mask is None
+    assert fast.stiction_mask is None
+
+
+def test_small_op_range_stiction_full_level():
+    # OP square wave of +/-0.4% with a flat PV: still stiction at the default level
+    t = pd.date_range(start='2023-01-01', periods=200, freq='s')
+    op = 50.0 + 0.4 * np.sign(np.sin(np.arange(200) * np.pi / 2 + 0.1))
+    df = pd.DataFrame({
+        'Time': t,
+        'SP': 50.0,
+        'PV': 50.0,
+        'OP': op
+    })
+    result = analyze_loop_health(df)
+    assert "疑似阀门粘滞 (Stiction): 输出变化但PV响应迟滞" in result.issues
+    assert result.stiction_mask.sum() > 0
+
+
+def test_array_api_matches_dataframe():
+    t = pd.date_range(start='2023-01-01', periods=100, freq='s')
+    df = pd.DataFrame({
+        'Time': t,
+        'SP': 50.0,
+        'PV': 40.0,
+        'OP': 100.0
+    })
+    from_df = analyze_loop_health(df)
+    from_arrays = analyze_loop_health_arrays(df['SP'].values, df['PV'].values, df['OP'].values)
+    assert from_arrays.status == from_df.status
+    assert from_arrays.issues == from_df.issues
+    assert np.array_equal(from_arrays.saturation_mask, from_df.saturation_mask)
+
+
+def test_unknown_level_rejected(clean_data):
+    with pytest.raises(ValueError):
+        analyze_loop_health(clean_data, level="Fast")
@@ -1,3 +1,4 @@
+import warnings
 import pytest
 import pandas as pd
 import numpy as np
@@ -32,3 +33,29 @@ def test_metrics_overshoot():
     # Step size 10. Max PV 12. Overshoot 2. % = 20%
     assert abs(metrics.overshoot - 20.0) < 1.0
     assert metrics.iae > 0
+
+def test_metrics_iae_trapezoidal():
+    # Error ramps linearly 0 -> 10 over 10s: trapezoidal IAE is exact (50)
+    t = pd.date_range(start='2023-01-01', periods=11, freq='s')
+    sp = np.full(11, 10.0)
+    pv = 10.0 - np.arange(11, dtype=float)
+    
+    df = pd.DataFrame({'Time': t, 'SP': sp, 'PV': pv})
+    metrics = calculate_metrics(df)
+    
+    assert abs(metrics.iae - 50.0) < 1e-9
+    assert abs(metrics.ise - 335.0) < 1e-9 # Exact 1000/3; trapezoid slightly overestimates convex e^2
+
+
+def test_metrics_tz_aware_time():
+    # ISO 8601 offsets (e.g. +08:00) ingest as a tz-aware Time column
+    t = pd.date_range(start='2023-01-01', periods=11, freq='s', tz='Asia/Shanghai')
+    sp = np.full(11, 10.0)
+    pv = 10.0 - np.arange(11, dtype=float)
+    
+    df = pd.DataFrame({'Time': t, 'SP': sp, 'PV': pv})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        metrics = calculate_metrics(df)
+    
+    assert abs(metrics.iae - 50.0) < 1e-9
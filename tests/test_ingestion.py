@@ -1,14 +1,14 @@
 import pytest
 import pandas as pd
-from io import StringIO
-from src.ingestion import load_and_validate_csv, IngestionError
+from io import BytesIO, StringIO
+from src.ingestion import load_and_validate_data, IngestionError
 
 def test_load_valid_csv():
     csv_data = """timestamp,setpoint,process_variable,output
 2023-01-01 10:00:00,50,45,10
 2023-01-01 10:00:01,50,46,12
 """
-    df = load_and_validate_csv(
+    df = load_and_validate_data(
         StringIO(csv_data),
         column_map={
             'timestamp': 'Time',
@@ -25,8 +25,8 @@ def test_missing_columns():
     csv_data = """timestamp,setpoint,process_variable
 2023-01-01 10:00:00,50,45
 """
-    with pytest.raises(IngestionError, match="CSV 中缺少指定的列"):
-        load_and_validate_csv(
+    with pytest.raises(IngestionError, match="文件中缺少指定的列"):
+        load_and_validate_data(
             StringIO(csv_data),
             column_map={
                 'timestamp': 'Time',
@@ -38,4 +38,86 @@ def test_missing_columns():
 
 def test_empty_file():
     with pytest.raises(IngestionError, match="提供的文件为空"):
-        load_and_validate_csv(StringIO(""))
\ No newline at end of file
+        load_and_validate_data(StringIO(""))
+
+
+def test_iso_offset_keeps_wall_clock():
+    # PyArrow must not convert '+08:00' timestamps to UTC before _parse_time sees them
+    csv_data = """timestamp,SP,PV,OP
+2024-01-01T10:00:00+08:00,50,45,10
+2024-01-01T10:00:01+08:00,50,46,12
+"""
+    df = load_and_validate_data(BytesIO(csv_data.encode()), "data.csv", column_map={'timestamp': 'Time'})
+    assert str(df['Time'].dt.tz) == 'UTC+08:00'
+    assert df['Time'].iloc[0].hour == 10
+
+
+def test_time_only_column():
+    # PyArrow would infer time64 here; pandas fills in the date instead
+    csv_data = """Time,SP,PV,OP
+10:00:00,50,45,10
+10:00:01,50,46,12
+"""
+    df = load_and_validate_data(BytesIO(csv_data.encode()), "data.csv")
+    assert pd.api.types.is_datetime64_any_dtype(df['Time'])
+    assert list(df['Time'].dt.second) == [0, 1]
+
+
+def test_ragged_csv_falls_back_to_c_engine():
+    # PyArrow rejects the short row; the C engine reads the rewound buffer and pads it with NaN
+    csv_data = """Time,SP,PV,OP
+2024-01-01 10:00:00,50,45,10
+2024-01-01 10:00:01,50,46
+2024-01-01 10:00:02,50,47,12
+"""
+    df = load_and_validate_data(BytesIO(csv_data.encode()), "data.csv")
+    assert len(df) == 2
+    assert list(df['OP']) == [10.0, 12.0]
+
+
+def test_calamine_falls_back_to_default_excel_reader(monkeypatch):
+    calls = []
+
+    def fake_read_excel(buffer, engine=None):
+        calls.append((engine, buffer.tell()))
+        if engine == 'calamine':
+            buffer.read()
+            raise ValueError("Unknown engine: calamine")
+        return pd.read_csv(buffer)
+
+    monkeypatch.setattr(pd, 'read_excel', fake_read_excel)
+    csv_data = b"Time,SP,PV,OP\n2024-01-01 10:00:00,50,45,10\n"
+    df = load_and_validate_data(BytesIO(csv_data), "data.xlsx")
+    # The fallback reader starts from a rewound buffer
+    assert calls == [('calamine', 0), (None, 0)]
+    assert len(df) == 1
+
+
+def test_numeric_columns_cast_and_coerced():
+    csv_data = """Time,SP,PV,OP
+2024-01-01 10:00:00,50,45,10
+2024-01-01 10:00:01,50,bad,12
+2024-01-01 10:00:02,50,47,14
+"""
+    df = load_and_validate_data(BytesIO(csv_data.encode()), "data.csv")
+    # SP/OP parse as integers and take the cast; PV goes through to_numeric coercion
+    assert all(df[col].dtype == 'float64' for col in ['SP', 'PV', 'OP'])
+    assert list(df['PV']) == [45.0, 47.0]
+
+
+def test_non_iso_time_uses_default_inference():
+    csv_data = """Time,SP,PV,OP
+2024/01/02 10:00:00,50,45,10
+2024/01/03 10:00:00,50,46,12
+"""
+    df = load_and_validate_data(BytesIO(csv_data.encode()), "data.csv")
+    assert list(df['Time'].dt.day) == [2, 3]
+
+
+def test_inconsistent_day_month_order_raises():
+    csv_data = """Time,SP,PV,OP
+01/02/2024 10:00:00,50,45,10
+13/02/2024 10:00:00,50,46,12
+"""
+    with pytest.raises(IngestionError, match="无法将 'Time' 列转换为日期时间格式"):
+        load_and_validate_data(BytesIO(csv_data.encode()), "data.csv")
@@ -1,3 +1,4 @@
+import warnings
 import pytest
 import numpy as np
 import pandas as pd
@@ -49,3 +50,24 @@ def test_fit_fopdt():
     assert abs(fitted.tau - 20.0) < 2.0
     assert abs(fitted.theta - 5.0) < 1.0
     assert abs(fitted.y0 - 10.0) < 0.5
+
+
+def test_fit_fopdt_tz_aware_time():
+    t = np.linspace(0, 100, 101)
+    op = np.zeros(101)
+    op[10:] = 5.0
+    
+    real_model = FOPDTModel(K=1.5, tau=20.0, theta=5.0, y0=10.0)
+    pv = real_model.predict(op, t)
+    
+    # Timestamps carrying a UTC offset, as ingested from ISO 8601 '+08:00' strings
+    time_index = pd.to_datetime('2023-01-01T00:00:00+08:00') + pd.to_timedelta(t, unit='s')
+    df = pd.DataFrame({'Time': time_index, 'OP': op, 'PV': pv})
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        fitted = fit_fopdt(df)
+    
+    assert abs(fitted.K - 1.5) < 0.1
+    assert abs(fitted.tau - 20.0) < 2.0
+    assert abs(fitted.theta - 5.0) < 1.0
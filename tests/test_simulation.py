@@ -2,7 +2,7 @@ import pytest
 import numpy as np
 from src.modeling import FOPDTModel
 from src.tuning import PIDParams
-from src.simulation import simulate_closed_loop
+from src.simulation import simulate_closed_loop, simulate_closed_loop_batch
 
 def test_simulation_step_response():
     # Model: K=1, Tau=10, Theta=0 (No delay for easy check)
@@ -15,8 +15,8 @@ def test_simulation_step_response():
     
     t_span = np.linspace(0, 100, 101)
     
-    def step_sp(t):
-        return 10.0 if t >= 10 else 0.0
+    # Array-aware setpoint: evaluated once over t_span
+    step_sp = lambda t: np.where(t >= 10, 10.0, 0.0)
         
     res = simulate_closed_loop(model, pid, step_sp, t_span, op_limits=(-100, 100))
     
@@ -39,3 +39,40 @@ def test_simulation_limit():
     res = simulate_closed_loop(model, pid, lambda t: 100, t_span, op_limits=(0, 50))
     
     assert np.all(res['OP'] <= 50.0)
+
+def test_simulation_setpoint_array():
+    # A precomputed SP profile must match the equivalent callable
+    model = FOPDTModel(K=2.0, tau=20.0, theta=3.0, y0=5.0)
+    pid = PIDParams(Kp=0.8, Ti=20.0, Td=0.0)
+    t_span = np.linspace(0, 100, 101)
+    
+    res_func = simulate_closed_loop(model, pid, lambda t: 10.0 if t >= 10 else 5.0, t_span)
+    res_arr = simulate_closed_loop(model, pid, np.where(t_span >= 10, 10.0, 5.0), t_span)
+    
+    assert np.allclose(res_func['SP'], res_arr['SP'])
+    assert np.allclose(res_func['PV'], res_arr['PV'])
+    assert np.allclose(res_func['OP'], res_arr['OP'])
+
+def test_simulation_batch_matches_single():
+    model = FOPDTModel(K=2.0, tau=50.0, theta=10.0, y0=50.0)
+    pids = [PIDParams(2.5, 15.0), PIDParams(0.65, 50.0), PIDParams(5.0, 0.0, 2.0), PIDParams(1.0, 20.0, 5.0)]
+    t_span = np.linspace(0, 300, 301)
+    sp = np.where(t_span >= 50, 60.0, 50.0)
+    
+    batch = simulate_closed_loop_batch(model, pids, sp, t_span, op_limits=(0, 20))
+    
+    for i, pid in enumerate(pids):
+        single = simulate_closed_loop(model, pid, sp, t_span, op_limits=(0, 20))
+        assert np.allclose(batch['PV'][i], single['PV'])
+        assert np.allclose(batch['OP'][i], single['OP'])
+
+
+def test_simulation_setpoint_array_length_mismatch():
+    model = FOPDTModel(K=1.0, tau=10.0, theta=0.0, y0=0.0)
+    pid = PIDParams(Kp=1.0, Ti=10.0)
+    t_span = np.linspace(0, 100, 101)
+    
+    with pytest.raises(ValueError):
+        simulate_closed_loop(model, pid, np.zeros(50), t_span)
+    with pytest.raises(ValueError):
+        simulate_closed_loop(model, pid, np.zeros(150), t_span)
@@ -1,6 +1,9 @@
+import copyreg
+import pickle
 import pytest
+import numpy as np
 from src.modeling import FOPDTModel
-from src.tuning import calculate_imc_pid, suggest_parameters, PIDParams, TuningSuggestion
+from src.tuning import calculate_imc_pid, calculate_imc_pid_batch, suggest_parameters, PIDParams, TuningSuggestion, TuningHistory
 
 def test_imc_calculation():
     model = FOPDTModel(K=2.0, tau=10.0, theta=1.0, y0=0)
@@ -21,4 +24,64 @@ def test_progressive_tuning_structure():
     
     # Check descriptions
     assert "限制步长" in suggestion.delta['Kp_desc']
-    assert len(suggestion.warnings) >= 2 # Kp and Ti warnings
\ No newline at end of file
+    assert len(suggestion.warnings) >= 2 # Kp and Ti warnings
+
+
+def test_pid_params_pb_and_pickle():
+    pid = PIDParams(Kp=4.0, Ti=20.0)
+    assert pid.PB == 25.0
+    assert PIDParams(Kp=0.0, Ti=20.0).PB == 9999.9
+    assert PIDParams.from_pb(25.0, 20.0) == pid
+    
+    restored = pickle.loads(pickle.dumps(pid))
+    assert restored == pid
+    assert restored.PB == 25.0
+
+
+class _LegacyPIDPickle:
+    """Pickles like the old dict-backed PIDParams: empty instance plus an attribute dict."""
+    def __init__(self, **state):
+        self.state = state
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (PIDParams, object, None), self.state)
+
+
+def test_pid_params_unpickles_legacy_dict_state():
+    payload = pickle.dumps([{'pid': _LegacyPIDPickle(Kp=2.0, Ti=10.0, Td=1.0)}])
+    pid = pickle.loads(payload)[0]['pid']
+    assert type(pid) is PIDParams
+    assert pid == PIDParams(Kp=2.0, Ti=10.0, Td=1.0)
+    assert pid.PB == 50.0
+
+
+def test_imc_batch_matches_scalar():
+    Ks = np.array([2.0, -0.5, 1e-8, 3.0])
+    taus = np.array([10.0, 50.0, 20.0, 5.0])
+    thetas = np.array([1.0, 10.0, 2.0, 0.0])
+    
+    for mode in ('aggressive', 'moderate', 'conservative'):
+        Kc, Ti = calculate_imc_pid_batch(Ks, taus, thetas, mode)
+        for i in range(len(Ks)):
+            pid = calculate_imc_pid(FOPDTModel(K=Ks[i], tau=taus[i], theta=thetas[i], y0=0), mode)
+            assert abs(Kc[i] - pid.Kp) < 1e-12
+            assert abs(Ti[i] - pid.Ti) < 1e-12
+
+
+def test_tuning_history_columns():
+    history = TuningHistory(cap=2)
+    current = PIDParams(Kp=1.0, Ti=10.0)
+    target = PIDParams(Kp=2.0, Ti=5.0)
+    for _ in range(5): # Forces the columns to grow
+        suggestion = suggest_parameters(current, target, max_change_percent=20.0)
+        history.append(suggestion)
+        current = suggestion.next_step_pid
+    
+    assert len(history) == 5
+    kp_next = history.column('Kp_next')
+    assert kp_next.shape == (5,)
+    assert abs(kp_next[0] - 1.2) < 1e-9
+    assert abs(kp_next[-1] - 2.0) < 1e-9
+    assert (history.column('Kp_tgt') == 2.0).all()
+    assert history.column('Ti_cur')[0] == 10.0
+    assert (history.column('Ti_tgt') == 5.0).all()